@@ -1,9 +1,39 @@
-from typing import List, Dict, Any, Optional, Callable
+from functools import lru_cache
+from random import choices
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from drone import Action, MoveAction, WaitAction, ScanAction
 from environment import Position
+from planner import MOVE_NAMES, astar
+
+# Planned paths keyed by (start, goal, diagonal, obstacle_signature), stored as planner direction codes
+_PATH_CACHE: Dict[tuple, Tuple[int, ...]] = {}
+_PATH_CACHE_SIZE = 1024
+# Random directions are drawn in batches of this size
+_DIRECTION_BATCH = 256
+
+def plan_path(environment, start: Position, goal: Position) -> Tuple[int, ...]:
+    """Return a cached path from start to goal, planning it with A* on a cache miss"""
+    diagonal = environment.allow_diagonal
+    key = ((start.x, start.y), (goal.x, goal.y), diagonal, environment.obstacle_signature())
+    path = _PATH_CACHE.get(key)
+    if path is None:
+        codes = astar(environment.obstacle_grid, start.x, start.y, goal.x, goal.y, diagonal)
+        path = tuple(int(code) for code in codes)
+        if len(_PATH_CACHE) >= _PATH_CACHE_SIZE:
+            # Evict the oldest entry (dicts preserve insertion order)
+            del _PATH_CACHE[next(iter(_PATH_CACHE))]
+        _PATH_CACHE[key] = path
+    return path
+
+@lru_cache(maxsize=128)
+def _build_waypoints(coordinates: Tuple[Tuple[int, int], ...]) -> Tuple[Position, ...]:
+    """Build patrol waypoints, shared between behaviors created from the same route"""
+    return tuple(Position(x, y) for x, y in coordinates)
 
 class Behavior:
     """Base class for complex drone behaviors"""
+    __slots__ = ('completed',)
+    
     def __init__(self):
         self.completed = False
     
@@ -21,34 +51,30 @@ class Behavior:
 
 class MoveToBehavior(Behavior):
     """Move to a specific position"""
+    __slots__ = ('target_position', 'path', 'path_index', 'current_action')
+    
     def __init__(self, target_position: Position):
         super().__init__()
         self.target_position = target_position
-        self.path = []
+        self.path = None  # Direction codes, planned lazily since planning needs the environment
+        self.path_index = 0
         self.current_action = None
     
     def start(self, drone):
-        # Simple path planning (direct route)
-        self._plan_path(drone)
+        # Path is planned on the first update
+        self.path = None
+        self.path_index = 0
     
-    def _plan_path(self, drone):
-        """Simple path planning from current position to target"""
-        self.path = []
-        current = drone.position
-        
-        while current.x != self.target_position.x or current.y != self.target_position.y:
-            if current.x < self.target_position.x:
-                self.path.append(MoveAction("right"))
-                current = Position(current.x + 1, current.y)
-            elif current.x > self.target_position.x:
-                self.path.append(MoveAction("left"))
-                current = Position(current.x - 1, current.y)
-            elif current.y < self.target_position.y:
-                self.path.append(MoveAction("down"))
-                current = Position(current.x, current.y + 1)
-            elif current.y > self.target_position.y:
-                self.path.append(MoveAction("up"))
-                current = Position(current.x, current.y - 1)
+    def _plan_path(self, drone, environment):
+        """A* path planning from current position to target"""
+        target = self.target_position
+        if not (0 <= target.x < environment.width and 0 <= target.y < environment.height):
+            # Off-grid targets are approached as closely as possible, stopping at the grid edge
+            target = Position(min(max(target.x, 0), environment.width - 1),
+                              min(max(target.y, 0), environment.height - 1))
+            self.target_position = target
+        self.path = plan_path(environment, drone.position, target)
+        self.path_index = 0
     
     def update(self, drone, environment) -> bool:
         if self.completed:
@@ -59,27 +85,41 @@ class MoveToBehavior(Behavior):
             self.completed = True
             return True
         
-        # Execute next action in path
-        if self.current_action is None and self.path:
-            self.current_action = self.path.pop(0)
+        if self.path is None:
+            self._plan_path(drone, environment)
+        
+        # No path to a target we have not reached means it is unreachable, so give up rather than wait forever
+        if not self.path and self.current_action is None:
+            print(f"Drone {drone.drone_id} cannot reach ({self.target_position.x}, {self.target_position.y})")
+            self.completed = True
+            return True
+        
+        # Execute next action in path, creating the MoveAction only when it is needed
+        if self.current_action is None and self.path_index < len(self.path):
+            self.current_action = MoveAction(MOVE_NAMES[self.path[self.path_index]])
+            self.path_index += 1
         
         if self.current_action:
+            previous_position = drone.position
             if self.current_action.execute(drone, environment):
                 self.current_action = None
                 # If action blocked, replan path
-                if drone.position.x != self.target_position.x or drone.position.y != self.target_position.y:
-                    self._plan_path(drone)
+                if drone.position == previous_position:
+                    self._plan_path(drone, environment)
         
         return False
 
 class ExploreBehavior(Behavior):
     """Explore the environment randomly"""
+    __slots__ = ('steps', 'current_step', 'directions', 'current_action', '_direction_buffer')
+    
     def __init__(self, steps: int = -1):
         super().__init__()
         self.steps = steps  # -1 means explore indefinitely
         self.current_step = 0
         self.directions = ["up", "down", "left", "right"]
         self.current_action = None
+        self._direction_buffer = []
     
     def update(self, drone, environment) -> bool:
         if self.completed:
@@ -90,9 +130,9 @@ class ExploreBehavior(Behavior):
             return True
         
         if self.current_action is None:
-            import random
-            direction = random.choice(self.directions)
-            self.current_action = MoveAction(direction)
+            if not self._direction_buffer:
+                self._direction_buffer = choices(self.directions, k=_DIRECTION_BATCH)
+            self.current_action = MoveAction(self._direction_buffer.pop())
         
         if self.current_action.execute(drone, environment):
             self.current_action = None
@@ -102,6 +142,8 @@ class ExploreBehavior(Behavior):
 
 class PatrolBehavior(Behavior):
     """Patrol between a list of positions"""
+    __slots__ = ('waypoints', 'current_waypoint_index', 'loops', 'current_loop', 'current_move_behavior')
+    
     def __init__(self, waypoints: List[Position], loops: int = -1):
         super().__init__()
         self.waypoints = waypoints
@@ -137,6 +179,9 @@ class PatrolBehavior(Behavior):
 
 class SearchBehavior(Behavior):
     """Search behavior that combines random movement with periodic scanning"""
+    __slots__ = ('steps_between_scans', 'scan_range', 'max_steps', 'step_count', 'total_steps',
+                 'directions', 'current_action', '_direction_buffer')
+    
     def __init__(self, steps_between_scans: int = 1, scan_range: int = 1, max_steps: int = -1):
         super().__init__()
         self.steps_between_scans = steps_between_scans
@@ -144,7 +189,9 @@ class SearchBehavior(Behavior):
         self.max_steps = max_steps  # -1 means infinite
         self.step_count = 0
         self.total_steps = 0
+        self.directions = ["up", "down", "left", "right"]
         self.current_action = None
+        self._direction_buffer = []
     
     def update(self, drone, environment) -> bool:
         if self.completed:
@@ -163,9 +210,9 @@ class SearchBehavior(Behavior):
                 self.step_count = 0
             else:
                 # Choose a random direction to move
-                import random
-                directions = ["up", "down", "left", "right"]
-                self.current_action = MoveAction(random.choice(directions))
+                if not self._direction_buffer:
+                    self._direction_buffer = choices(self.directions, k=_DIRECTION_BATCH)
+                self.current_action = MoveAction(self._direction_buffer.pop())
                 
         # Execute the current action
         if self.current_action.execute(drone, environment):
@@ -186,7 +233,7 @@ class BehaviorFactory:
         elif behavior_type == "explore":
             return ExploreBehavior(params.get("steps", -1))
         elif behavior_type == "patrol":
-            waypoints = [Position(wp["x"], wp["y"]) for wp in params["waypoints"]]
+            waypoints = _build_waypoints(tuple((wp["x"], wp["y"]) for wp in params["waypoints"]))
             return PatrolBehavior(waypoints, params.get("loops", -1))
         elif behavior_type == "search":
             return SearchBehavior(
@@ -3,6 +3,14 @@ from typing import Dict, List, Optional, Tuple
 from drone import MoveAction
 from environment import GridEnvironment
 
+_NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+                 "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+# Matches "drone1", "drone 1", "drone #1", "drone-1" and "drone number one" in a single pass
+# Digits may run straight into the next word ("drone1up=3"); number words must end at a word boundary
+_DRONE_RE = re.compile(r"\bdrone(?:\s*number)?[\s#-]*(\d+|(?:" + "|".join(_NUMBER_WORDS) + r")\b)",
+                       re.IGNORECASE)
+_MOVE_RE = re.compile(r"(up|down|left|right)\s*=\s*(\d+)", re.IGNORECASE)
+
 class CommandProcessor:
     """Processes text commands and converts them to drone actions"""
     
@@ -20,17 +28,14 @@ class CommandProcessor:
         """Process a text command and apply it to drones"""
         print(f"Processing command: {command_text}")
         
-        # Try to extract drone ID and movement commands using regex
-        # Pattern to match: "drone(\s*)(\d+)" to capture both "drone 1" and "drone1" formats
-        drone_pattern = r"drone\s*(\d+)"
-        
         # Find drone ID
-        drone_match = re.search(drone_pattern, command_text.lower())
+        drone_match = _DRONE_RE.search(command_text)
         if not drone_match:
             print("No drone ID found in command")
             return False
         
-        drone_id = int(drone_match.group(1))
+        drone_token = drone_match.group(1)
+        drone_id = int(drone_token) if drone_token.isdigit() else _NUMBER_WORDS[drone_token.lower()]
         if drone_id not in self.drone_map:
             print(f"Drone {drone_id} not found")
             return False
@@ -38,8 +43,7 @@ class CommandProcessor:
         drone = self.drone_map[drone_id]
         
         # Find all movement commands
-        movement_pattern = r"(up|down|left|right)\s*=\s*(\d+)"
-        movement_matches = re.findall(movement_pattern, command_text.lower())
+        movement_matches = [(direction.lower(), steps) for direction, steps in _MOVE_RE.findall(command_text)]
         if not movement_matches:
             print("No movement commands found")
             return False
@@ -48,11 +52,8 @@ class CommandProcessor:
         drone.clear_behavior()
         drone.clear_actions()
         
-        # Add movement actions
-        for direction, steps_str in movement_matches:
-            steps = int(steps_str)
-            for _ in range(steps):
-                drone.add_action(MoveAction(direction))
+        # Add one multi-step movement action per direction
+        drone.extend_actions(MoveAction(direction, int(steps_str)) for direction, steps_str in movement_matches)
         
         print(f"Command executed: Drone {drone_id} will move {movement_matches}")
         return True 
\ No newline at end of file
@@ -1,5 +1,6 @@
 import pygame
-from typing import List, Dict, Any, Optional
+from collections import deque
+from typing import Dict, Any, Optional, Deque, Iterable
 from environment import Position, Entity, GridEnvironment
 from event_system import Event
 
@@ -9,11 +10,37 @@ DIRECTIONS = {
     "down": Position(0, 1),
     "left": Position(-1, 0),
     "right": Position(1, 0),
+    "up_left": Position(-1, -1),
+    "up_right": Position(1, -1),
+    "down_left": Position(-1, 1),
+    "down_right": Position(1, 1),
     "stay": Position(0, 0)
 }
 
+# Integer direction codes used by MoveAction; UP..DOWN_RIGHT match the planner's codes
+UP, DOWN, LEFT, RIGHT, UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT, STAY = range(9)
+DELTAS = ((0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (1, -1), (-1, 1), (1, 1), (0, 0))
+DIRECTION_CODES = {
+    "up": UP, "down": DOWN, "left": LEFT, "right": RIGHT,
+    "up_left": UP_LEFT, "up_right": UP_RIGHT, "down_left": DOWN_LEFT, "down_right": DOWN_RIGHT,
+    "stay": STAY
+}
+
+# Fonts can only be created after pygame.init(), so they are loaded on first use
+_FONT = None
+# Rendered drone ID labels, which never change once drawn
+_ID_SURFACES: Dict[int, pygame.Surface] = {}
+
+def _get_font():
+    global _FONT
+    if _FONT is None:
+        _FONT = pygame.font.SysFont(None, 24)
+    return _FONT
+
 class Action:
     """Base class for primitive actions a drone can take"""
+    __slots__ = ('completed',)
+    
     def __init__(self):
         self.completed = False
     
@@ -26,36 +53,52 @@ class Action:
         self.completed = False
 
 class MoveAction(Action):
-    """Move in a specified direction"""
-    def __init__(self, direction: str):
+    """Move in a specified direction for one or more steps"""
+    __slots__ = ('direction', 'dir_code', 'steps', 'moves_per_tick', '_remaining')
+    
+    def __init__(self, direction: str, steps: int = 1, moves_per_tick: int = 1):
         super().__init__()
         self.direction = direction
+        self.dir_code = DIRECTION_CODES.get(direction)  # None for unknown directions
+        self.steps = steps
+        self.moves_per_tick = moves_per_tick  # Keep at 1 to move one cell per simulation tick
+        self._remaining = steps
     
     def execute(self, drone, environment) -> bool:
         if self.completed:
             return True
         
-        if self.direction not in DIRECTIONS:
+        if self.dir_code is None:
             print(f"Invalid direction: {self.direction}")
             self.completed = True
             return True
         
-        delta = DIRECTIONS[self.direction]
-        new_position = drone.position + delta
-        
-        if environment.is_valid_position(new_position):
-            drone.position = new_position
-            self.completed = True
+        dx, dy = DELTAS[self.dir_code]
+        for _ in range(min(self.moves_per_tick, self._remaining)):
+            new_position = Position(drone.position.x + dx, drone.position.y + dy)
+            if not environment.is_valid_position(new_position):
+                # Can't move there, so the rest of the move is abandoned
+                self.completed = True
+                environment.event_manager.trigger("movement_blocked", drone=drone, direction=self.direction)
+                return True
+            
+            environment.move_entity(drone, new_position)
+            self._remaining -= 1
             environment.event_manager.trigger("drone_moved", drone=drone, position=new_position)
-            return True
-        else:
-            # Can't move there
+        
+        if self._remaining <= 0:
             self.completed = True
-            environment.event_manager.trigger("movement_blocked", drone=drone, direction=self.direction)
             return True
+        return False
+    
+    def reset(self):
+        super().reset()
+        self._remaining = self.steps
 
 class WaitAction(Action):
     """Wait for a specified number of ticks"""
+    __slots__ = ('ticks', 'current_tick')
+    
     def __init__(self, ticks: int = 1):
         super().__init__()
         self.ticks = ticks
@@ -77,6 +120,8 @@ class WaitAction(Action):
 
 class ScanAction(Action):
     """Scan the surrounding area for entities"""
+    __slots__ = ('range',)
+    
     def __init__(self, range: int = 1):
         super().__init__()
         self.range = range
@@ -85,13 +130,8 @@ class ScanAction(Action):
         if self.completed:
             return True
         
-        detected_entities = []
-        for dx in range(-self.range, self.range + 1):
-            for dy in range(-self.range, self.range + 1):
-                scan_pos = Position(drone.position.x + dx, drone.position.y + dy)
-                if environment.is_valid_position(scan_pos):
-                    entities = environment.get_entities_at(scan_pos)
-                    detected_entities.extend(entities)
+        # One box query over the whole (2R+1)^2 neighborhood
+        detected_entities = environment.get_entities_in_range(drone.position, self.range)
         
         # Trigger scan completed event with results
         environment.event_manager.trigger(
@@ -118,16 +158,10 @@ class Detector:
         if not self.drone:
             return []
             
-        detected_entities = []
-        for dx in range(-self.range, self.range + 1):
-            for dy in range(-self.range, self.range + 1):
-                scan_pos = Position(self.drone.position.x + dx, self.drone.position.y + dy)
-                if environment.is_valid_position(scan_pos):
-                    entities = environment.get_entities_at(scan_pos)
-                    detected_entities.extend(entities)
-        
-        # Filter out the drone itself and other non-target entities
-        targets = [e for e in detected_entities if e.entity_type == 'target' and e.id != self.drone.id]
+        # Only targets other than the drone itself, filtered in the same query
+        targets = environment.get_entities_in_range(
+            self.drone.position, self.range, entity_type='target', exclude_id=self.drone.id
+        )
         
         if targets:
             # Trigger target detected event
@@ -138,15 +172,24 @@ class Detector:
             )
             
         return targets
+    
+    def covers(self, entity) -> bool:
+        """Whether check would report entity, given where it and the drone are now"""
+        drone = self.drone
+        return (drone is not None and entity is not drone and entity.entity_type == 'target' and
+                abs(entity.position.x - drone.position.x) <= self.range and
+                abs(entity.position.y - drone.position.y) <= self.range)
 
 class Drone(Entity):
     """Represents a drone in the simulation"""
+    __slots__ = ('drone_id', 'color', 'current_action', 'action_queue', 'current_behavior', 'detector')
+    
     def __init__(self, position: Position, drone_id: int):
         super().__init__(position, "drone")
         self.drone_id = drone_id
         self.color = (0, 100, 255)  # Blue by default
         self.current_action: Optional[Action] = None
-        self.action_queue: List[Action] = []
+        self.action_queue: Deque[Action] = deque()
         self.current_behavior = None
         self.detector = None  # New property for the detector
     
@@ -158,41 +201,65 @@ class Drone(Entity):
     def update(self, environment):
         """Update drone state based on current action or behavior"""
         if self.current_behavior:
-            # Let behavior manage actions
-            self.current_behavior.update(self, environment)
+            # Let behavior manage actions, dropping it once it reports completion
+            if self.current_behavior.update(self, environment):
+                self.clear_behavior()
         elif self.current_action:
             # Execute current action
             if self.current_action.execute(self, environment):
                 self.current_action = None
                 if self.action_queue:
-                    self.current_action = self.action_queue.pop(0)
+                    self.current_action = self.action_queue.popleft()
         
         # Always check for targets if we have a detector
         if self.detector:
             self.detector.check(environment)
+        
+        # With nothing left to do, sleep until a new action or behavior is assigned
+        if self.current_behavior is None and self.current_action is None:
+            self.idle = True
+    
+    def notices(self, entity) -> bool:
+        """An idle drone wakes up when a target enters its detector's range"""
+        return self.detector is not None and self.detector.covers(entity)
     
     def render(self, surface, cell_size):
         """Render the drone on the surface"""
+        blits = []
+        self.render_batched(surface, cell_size, blits)
+        surface.blits(blits, doreturn=False)
+    
+    def render_batched(self, surface, cell_size, blits):
+        """Draw the drone body and queue its ID label for a batched blit"""
         x = self.position.x * cell_size
         y = self.position.y * cell_size
         pygame.draw.rect(surface, self.color, (x + 2, y + 2, cell_size - 4, cell_size - 4))
         
-        # Draw drone ID
-        font = pygame.font.SysFont(None, 24)
-        text = font.render(str(self.drone_id), True, (255, 255, 255))
-        text_rect = text.get_rect(center=(x + cell_size // 2, y + cell_size // 2))
-        surface.blit(text, text_rect)
+        # Queue drone ID
+        text = _ID_SURFACES.get(self.drone_id)
+        if text is None:
+            text = _get_font().render(str(self.drone_id), True, (255, 255, 255))
+            _ID_SURFACES[self.drone_id] = text
+        blits.append((text, text.get_rect(center=(x + cell_size // 2, y + cell_size // 2))))
     
     def add_action(self, action: Action):
         """Add an action to the queue"""
+        self.idle = False
         if self.current_action is None:
             self.current_action = action
         else:
             self.action_queue.append(action)
     
+    def extend_actions(self, actions: Iterable[Action]):
+        """Add several actions to the queue in order"""
+        self.idle = False
+        self.action_queue.extend(actions)
+        if self.current_action is None and self.action_queue:
+            self.current_action = self.action_queue.popleft()
+    
     def clear_actions(self):
         """Clear all pending actions"""
-        self.action_queue = []
+        self.action_queue.clear()
         self.current_action = None
     
     def set_behavior(self, behavior):
@@ -200,6 +267,7 @@ class Drone(Entity):
         self.clear_actions()
         self.current_behavior = behavior
         if behavior:
+            self.idle = False
             behavior.start(self)
     
     def clear_behavior(self):
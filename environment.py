@@ -1,42 +1,76 @@
 import pygame
+import itertools
 import numpy as np
+from collections import defaultdict
 from typing import List, Dict, Any, Tuple
 
 class Position:
+    __slots__ = ('x', 'y', '_hash')
+    
     def __init__(self, x: int, y: int):
         self.x = x
         self.y = y
+        # Positions are treated as immutable, so the hash can be computed once
+        self._hash = (x * 73856093) ^ (y * 19349663)
     
     def __eq__(self, other):
-        if not isinstance(other, Position):
-            return False
-        return self.x == other.x and self.y == other.y
+        return type(other) is Position and self.x == other.x and self.y == other.y
     
     def __hash__(self):
-        return hash((self.x, self.y))
+        return self._hash
     
     def __add__(self, other):
         return Position(self.x + other.x, self.y + other.y)
 
 class Entity:
+    __slots__ = ('position', 'entity_type', 'id', '_slot', 'idle')
+    
+    # Entities that block movement are counted in the environment's obstacle grid
+    blocks_movement = False
+    
     def __init__(self, position: Position, entity_type: str):
+        # Once added to an environment, move via GridEnvironment.move_entity so its indexes stay valid
         self.position = position
         self.entity_type = entity_type
         self.id = id(self)
+        self._slot = None  # Index into the environment's entity tables, set by add_entity
+        self.idle = False  # Idle entities are skipped by GridEnvironment.update
     
     def update(self, environment):
         pass
     
+    def notices(self, entity) -> bool:
+        """Whether this entity, while idle, should be woken by entity arriving at its current position"""
+        return False
+    
     def render(self, surface, cell_size):
         pass
+    
+    def render_batched(self, surface, cell_size, blits):
+        """Render the entity, appending any (surface, position) blits to the batch instead of blitting them"""
+        self.render(surface, cell_size)
+
+# Distinguishes environments in obstacle_signature, so module-level caches never mix up two grids
+_ENVIRONMENT_IDS = itertools.count()
 
 class GridEnvironment:
-    def __init__(self, width: int, height: int, cell_size: int = 20):
+    def __init__(self, width: int, height: int, cell_size: int = 20, allow_diagonal: bool = False):
         self.width = width
         self.height = height
         self.cell_size = cell_size
+        self.allow_diagonal = allow_diagonal  # Let the path planner use 8-way moves
         self.entities: List[Entity] = []
+        # Structure-of-arrays copy of entity positions/types, parallel to self.entities.
+        # The arrays have spare capacity; only the first len(self.entities) slots are in use.
+        self._xs = np.empty(0, dtype=np.int32)
+        self._ys = np.empty(0, dtype=np.int32)
+        self._types = np.empty(0, dtype=object)
+        self._ids = np.empty(0, dtype=np.int64)
+        # Entities bucketed by (x, y) for point lookups
+        self._by_pos: Dict[Tuple[int, int], List[Entity]] = defaultdict(list)
         self.grid = np.zeros((height, width), dtype=object)
+        # Number of movement-blocking entities per cell, consumed by the path planner
+        self.obstacle_grid = np.zeros((height, width), dtype=np.int8)
         self.screen_width = width * cell_size
         # Add extra height for the text input area
         self.text_input_height = 40
@@ -45,12 +79,28 @@ class GridEnvironment:
         self.clock = None
         self.running = False
         self.event_manager = None  # Will be set later
+        # Bumped whenever obstacle_grid changes so cached paths can be invalidated
+        self.obstacle_version = 0
+        self._instance_id = next(_ENVIRONMENT_IDS)
         
         # Text input related variables
         self.input_text = ""
         self.input_active = False
         self.command_processor = None  # Will be set from main.py
         
+        # Text rendering caches, created once pygame is initialized
+        self._font = None
+        self._prompt_surface = None
+        self._input_surface = None
+        self._rendered_input_text = None
+        # Pre-rasterized grid and input box, rebuilt if the grid dimensions change
+        self._background = None
+        self._background_key = None
+        # Set when something visible changed since the last render
+        self._dirty = True
+        # Entities that went idle during update, checked when an entity arrives that they might notice
+        self._sleepers = set()
+        
     def initialize(self):
         """Initialize Pygame and environment"""
         pygame.init()
@@ -58,32 +108,147 @@ class GridEnvironment:
         pygame.display.set_caption("Drone Swarm Simulation")
         self.clock = pygame.time.Clock()
         self.running = True
+        
+        self._font = pygame.font.SysFont(None, 32)
+        self._prompt_surface = self._font.render("Type command here...", True, (150, 150, 150))
+        self._build_background()
+        self._dirty = True
+    
+    def mark_dirty(self, event=None):
+        """Request a redraw on the next frame"""
+        self._dirty = True
     
     def add_entity(self, entity: Entity):
         """Add an entity to the environment"""
+        slot = len(self.entities)
+        if slot == len(self._xs):
+            self._grow_tables()
+        entity._slot = slot
         self.entities.append(entity)
+        self._xs[slot] = entity.position.x
+        self._ys[slot] = entity.position.y
+        self._types[slot] = entity.entity_type
+        self._ids[slot] = entity.id
+        self._by_pos[(entity.position.x, entity.position.y)].append(entity)
+        self._dirty = True
+        if entity.blocks_movement:
+            self.obstacle_grid[entity.position.y, entity.position.x] += 1
+            self.obstacle_version += 1
+        self._wake_sleepers(entity)
     
     def remove_entity(self, entity: Entity):
         """Remove an entity from the environment"""
-        if entity in self.entities:
-            self.entities.remove(entity)
+        slot = entity._slot
+        if slot is not None and slot < len(self.entities) and self.entities[slot] is entity:
+            # Swap the last entity into the freed slot so removal is O(1)
+            last = self.entities.pop()
+            last_slot = len(self.entities)
+            if slot != last_slot:
+                self.entities[slot] = last
+                last._slot = slot
+                self._xs[slot] = self._xs[last_slot]
+                self._ys[slot] = self._ys[last_slot]
+                self._types[slot] = self._types[last_slot]
+                self._ids[slot] = self._ids[last_slot]
+            self._types[last_slot] = None
+            entity._slot = None
+            self._sleepers.discard(entity)
+            self._remove_from_bucket(entity)
+            self._dirty = True
+            if entity.blocks_movement:
+                self.obstacle_grid[entity.position.y, entity.position.x] -= 1
+                self.obstacle_version += 1
+    
+    def _grow_tables(self):
+        """Double the capacity of the entity position tables"""
+        capacity = max(16, 2 * len(self._xs))
+        count = len(self.entities)
+        for name in ('_xs', '_ys', '_types', '_ids'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:count] = old[:count]
+            setattr(self, name, new)
+    
+    def move_entity(self, entity: Entity, position: Position):
+        """Move an entity to a new position, keeping the position tables in sync"""
+        if entity.blocks_movement:
+            self.obstacle_grid[entity.position.y, entity.position.x] -= 1
+            self.obstacle_grid[position.y, position.x] += 1
+            self.obstacle_version += 1
+        if entity._slot is not None:
+            self._remove_from_bucket(entity)
+            self._by_pos[(position.x, position.y)].append(entity)
+            self._xs[entity._slot] = position.x
+            self._ys[entity._slot] = position.y
+        entity.position = position
+        self._dirty = True
+        self._wake_sleepers(entity)
+    
+    def _wake_sleepers(self, entity: Entity):
+        """Wake the idle entities that notice entity at its current position"""
+        if not self._sleepers:
+            return
+        for sleeper in list(self._sleepers):
+            if not sleeper.idle:
+                self._sleepers.discard(sleeper)  # Already woken by a new action or behavior
+            elif sleeper is not entity and sleeper.notices(entity):
+                sleeper.idle = False
+                self._sleepers.discard(sleeper)
+    
+    def _remove_from_bucket(self, entity: Entity):
+        """Remove an entity from the bucket for its current position"""
+        key = (entity.position.x, entity.position.y)
+        bucket = self._by_pos[key]
+        bucket.remove(entity)
+        if not bucket:
+            del self._by_pos[key]
+    
+    def obstacle_signature(self) -> Tuple[int, int, int, int]:
+        """Return a key that changes whenever cached paths may no longer be valid"""
+        return (self._instance_id, self.width, self.height, self.obstacle_version)
     
     def get_entities_at(self, position: Position) -> List[Entity]:
         """Get all entities at a specific position"""
-        return [e for e in self.entities if e.position == position]
+        return list(self._by_pos.get((position.x, position.y), ()))
+    
+    def get_entities_in_box(self, x0: int, y0: int, x1: int, y1: int,
+                            entity_type: str = None, exclude_id: int = None) -> List[Entity]:
+        """Get all entities inside the inclusive box (x0, y0)-(x1, y1), optionally filtered"""
+        count = len(self.entities)
+        xs, ys = self._xs[:count], self._ys[:count]
+        mask = (xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1)
+        if entity_type is not None:
+            mask &= self._types[:count] == entity_type
+        if exclude_id is not None:
+            mask &= self._ids[:count] != exclude_id
+        return [self.entities[i] for i in np.flatnonzero(mask)]
+    
+    def get_entities_in_range(self, position: Position, radius: int,
+                              entity_type: str = None, exclude_id: int = None) -> List[Entity]:
+        """Get all entities within a square neighborhood of the given radius around a position"""
+        return self.get_entities_in_box(position.x - radius, position.y - radius,
+                                        position.x + radius, position.y + radius,
+                                        entity_type=entity_type, exclude_id=exclude_id)
     
     def is_valid_position(self, position: Position) -> bool:
-        """Check if a position is within the grid boundaries"""
+        """Check if a position is within the grid boundaries and not blocked"""
         return (0 <= position.x < self.width and 
-                0 <= position.y < self.height)
+                0 <= position.y < self.height and
+                self.obstacle_grid[position.y, position.x] == 0)
     
     def update(self):
-        """Update all entities in the environment"""
+        """Update all entities in the environment, skipping idle ones"""
         for entity in self.entities:
-            entity.update(self)
+            if not entity.idle:
+                entity.update(self)
+                if entity.idle:
+                    self._sleepers.add(entity)
     
     def process_input_events(self, event):
         """Process keyboard events for text input"""
+        if event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN, pygame.VIDEOEXPOSE):
+            self._dirty = True
+        
         if event.type == pygame.MOUSEBUTTONDOWN:
             # Check if click was in text input area
             input_rect = pygame.Rect(0, self.height * self.cell_size, 
@@ -103,36 +268,55 @@ class GridEnvironment:
                     # Add character to input text
                     self.input_text += event.unicode
     
-    def render(self):
-        """Render the environment and all entities"""
-        self.screen.fill((255, 255, 255))
+    def _build_background(self):
+        """Draw the static grid lines and input box outline onto a reusable surface"""
+        self._background = pygame.Surface((self.screen_width, self.screen_height))
+        self._background.fill((255, 255, 255))
         
         # Draw grid lines
         for x in range(0, self.screen_width, self.cell_size):
-            pygame.draw.line(self.screen, (200, 200, 200), 
+            pygame.draw.line(self._background, (200, 200, 200), 
                             (x, 0), (x, self.height * self.cell_size))
         for y in range(0, self.height * self.cell_size, self.cell_size):
-            pygame.draw.line(self.screen, (200, 200, 200), 
+            pygame.draw.line(self._background, (200, 200, 200), 
                             (0, y), (self.screen_width, y))
         
-        # Render entities
+        # Draw text input area
+        pygame.draw.rect(self._background, (200, 200, 200), self._input_rect(), 2)
+        self._background_key = (self.width, self.height, self.cell_size)
+    
+    def _input_rect(self) -> pygame.Rect:
+        """Rectangle of the text input box"""
+        return pygame.Rect(10, self.height * self.cell_size + 10, 
+                           self.screen_width - 20, self.text_input_height - 20)
+    
+    def render_entities(self, surface):
+        """Render all entities, drawing their queued blits in a single batched call"""
+        blits = []
         for entity in self.entities:
-            entity.render(self.screen, self.cell_size)
+            entity.render_batched(surface, self.cell_size, blits)
+        if blits:
+            surface.blits(blits, doreturn=False)
+    
+    def render(self):
+        """Render the environment and all entities"""
+        if self._background_key != (self.width, self.height, self.cell_size):
+            self._build_background()
+        self.screen.blit(self._background, (0, 0))
         
-        # Draw text input area
-        input_rect = pygame.Rect(10, self.height * self.cell_size + 10, 
-                                self.screen_width - 20, self.text_input_height - 20)
-        pygame.draw.rect(self.screen, (200, 200, 200), input_rect, 2)
+        self.render_entities(self.screen)
+        
+        input_rect = self._input_rect()
         
-        # Render input text
-        font = pygame.font.SysFont(None, 32)
-        text_surface = font.render(self.input_text, True, (0, 0, 0))
-        self.screen.blit(text_surface, (input_rect.x + 5, input_rect.y + 5))
+        # Render input text, re-rasterizing only when it has changed
+        if self.input_text != self._rendered_input_text:
+            self._input_surface = self._font.render(self.input_text, True, (0, 0, 0))
+            self._rendered_input_text = self.input_text
+        self.screen.blit(self._input_surface, (input_rect.x + 5, input_rect.y + 5))
         
         # Draw prompt text if no input
         if not self.input_text:
-            prompt_text = font.render("Type command here...", True, (150, 150, 150))
-            self.screen.blit(prompt_text, (input_rect.x + 5, input_rect.y + 5))
+            self.screen.blit(self._prompt_surface, (input_rect.x + 5, input_rect.y + 5))
         
         pygame.display.flip()
     
@@ -145,7 +329,9 @@ class GridEnvironment:
                 self.process_input_events(event)
             
             self.update()
-            self.render()
+            if self._dirty:
+                self._dirty = False
+                self.render()
             self.clock.tick(fps)
         
         pygame.quit() 
\ No newline at end of file
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from typing import Dict, List, Callable, Any
 
 class Event:
@@ -17,30 +18,29 @@ class EventCallback:
 class EventManager:
     """Manages events and callbacks in the simulation"""
     def __init__(self):
-        self.callbacks = {}
+        self.callbacks: Dict[str, List[Callable]] = defaultdict(list)
     
     def register(self, event_type: str):
         """Decorator to register a callback for an event type"""
         def decorator(callback):
-            if event_type not in self.callbacks:
-                self.callbacks[event_type] = []
             self.callbacks[event_type].append(callback)
             return callback
         return decorator
     
     def on(self, event_type: str, callback: Callable):
         """Register a callback for an event type"""
-        if event_type not in self.callbacks:
-            self.callbacks[event_type] = []
         self.callbacks[event_type].append(callback)
     
     def trigger(self, event_type: str, **kwargs):
         """Trigger an event with the provided data"""
+        # Most per-tick events have no subscribers, so skip building the Event for them
+        callbacks = self.callbacks.get(event_type)
+        if not callbacks:
+            return
         event = Event(event_type, **kwargs)
-        if event_type in self.callbacks:
-            for callback in self.callbacks[event_type]:
-                callback(event)
+        for callback in callbacks:
+            callback(event)
     
     def clear_all(self):
         """Clear all registered callbacks"""
-        self.callbacks = {} 
\ No newline at end of file
+        self.callbacks = defaultdict(list) 
\ No newline at end of file
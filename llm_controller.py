@@ -2,10 +2,28 @@ import json
 import random
 import os
 import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
-import traceback
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 import openai
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard json module is used without it
+    orjson = None
+
+try:
+    import fastjsonschema
+except ImportError:  # fastjsonschema is optional; behavior commands are then checked while executing
+    fastjsonschema = None
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional; asyncio's default loop is used without it
+    uvloop = None
 from behavior import BehaviorFactory, MoveToBehavior, ExploreBehavior, PatrolBehavior, SearchBehavior
 from drone import MoveAction
 from event_system import EventCallback, Event
@@ -15,68 +33,330 @@ from environment import Position
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("LLMController")
 
+OPENAI_MODEL = "gpt-4o-mini"  # Small, fast model; the replies are short structured JSON
+OPENAI_TEMPERATURE = 0.1  # Low temperature for more deterministic outputs
+OPENAI_MAX_TOKENS = 400  # Commands are well under this; caps latency and cost of runaway replies
+# Transient API failures are retried with jittered exponential backoff, capped at OPENAI_MAX_BACKOFF seconds
+OPENAI_MAX_ATTEMPTS = 5
+OPENAI_MAX_BACKOFF = 20.0
+_RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+# Maximum number of raw LLM responses kept for repeated prompts
+RESPONSE_CACHE_SIZE = 256
+# Raw response content keyed by (namespace, request hash), in LRU order; shared by all controllers, so it only
+# ever holds replies whose command applied, and a replayed reply that fails to apply is evicted for everyone
+_RESPONSE_CACHE: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+# Maximum number of parsed commands kept for repeated goals
+GOAL_CACHE_SIZE = 256
+# Upper bound on goals sent to the API at once by process_goals
+MAX_CONCURRENT_GOALS = 32
+
+# Keyword sets for recognizing movement commands, matched against the words of the lowercased text;
+# words are runs of letters, so "drone1" still counts as a drone mention
+_WORD_RE = re.compile(r"[a-z]+")
+_MOVEMENT_KEYWORDS = frozenset({"move", "go", "take", "send", "navigate", "direct", "guide", "fly", "left",
+                                "right", "up", "down", "north", "south", "east", "west"})
+_DRONE_KEYWORDS = frozenset({"drone", "drones", "uav", "uavs", "quadcopter", "quadcopters", "copter", "copters"})
+# Directions accepted in JSON move commands
+_VALID_DIRECTIONS = frozenset({"up", "down", "left", "right"})
+# Goal words checked by the simple goal parser, in priority order; whole words so "outlook" is not "look"
+_GOAL_KEYWORDS = (
+    ("search", frozenset({"search", "searching", "find", "look", "scan", "scanning", "detect"})),
+    ("explore", frozenset({"explore", "exploring", "roam", "roaming", "wander", "wandering"})),
+    ("patrol", frozenset({"patrol", "patrolling", "guard", "guarding", "watch"})),
+)
+
+# Everything that does not depend on the environment, sent as its own system message ahead of the
+# environment details so every request shares a byte-identical prefix for OpenAI's prompt caching
+_STATIC_SYSTEM_PREFIX = """You control a drone swarm. Translate the user's goal into behavior commands for the drones.
+
+Reply with JSON only, under 300 tokens, in this form:
+{"behavior_type": "<explore|move_to|patrol|search>", "targets": [{"drone_id": <id>}, ...], "parameters": {...}}
+Give different drones different behaviors with a list of such commands: [<command>, <command>, ...]
+
+Behaviors and parameters:
+- explore: random exploration. steps (-1 = indefinite, optional)
+- move_to: go to a cell. x (0..width-1), y (0..height-1)
+- patrol: cycle through waypoints. waypoints [{"x": <x>, "y": <y>}, ...], loops (-1 = indefinite, optional)
+- search: move with periodic scans. steps_between_scans, scan_range, max_steps (-1 = indefinite, optional)
+
+If the goal cannot be understood, reply {"error": "Could not parse goal"}
+"""
+
+# Shape of the behavior commands the LLM is asked to produce, a single command or a list of them
+_INTEGER = {"type": "integer"}
+_POSITION_SCHEMA = {
+    "type": "object",
+    "required": ["x", "y"],
+    "properties": {"x": _INTEGER, "y": _INTEGER},
+}
+
+def _parameters_when(behavior_type: str, parameters: Dict) -> Dict:
+    """Schema branch applying the parameters schema to commands of one behavior type"""
+    return {
+        "if": {"required": ["behavior_type"], "properties": {"behavior_type": {"const": behavior_type}}},
+        "then": {"properties": {"parameters": parameters}},
+    }
+
+_BEHAVIOR_SCHEMA = {
+    "type": "object",
+    "required": ["behavior_type", "targets", "parameters"],
+    "properties": {
+        "behavior_type": {"enum": ["explore", "move_to", "patrol", "search"]},
+        "targets": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["drone_id"],
+                "properties": {"drone_id": {"type": "integer"}},
+            },
+        },
+        "parameters": {"type": "object"},
+    },
+    # The behaviors compare these numbers every tick, so a string slipping through would crash the update loop
+    "allOf": [
+        _parameters_when("explore", {"properties": {"steps": _INTEGER}}),
+        _parameters_when("move_to", _POSITION_SCHEMA),
+        _parameters_when("patrol", {
+            "required": ["waypoints"],
+            "properties": {
+                "waypoints": {"type": "array", "minItems": 1, "items": _POSITION_SCHEMA},
+                "loops": _INTEGER,
+            },
+        }),
+        _parameters_when("search", {"properties": {
+            "steps_between_scans": _INTEGER,
+            "scan_range": _INTEGER,
+            "max_steps": _INTEGER,
+        }}),
+    ],
+}
+_COMMAND_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    # if/then/else rather than anyOf so errors name the offending field
+    "if": {"type": "array"},
+    "then": {"minItems": 1, "items": _BEHAVIOR_SCHEMA},
+    "else": _BEHAVIOR_SCHEMA,
+}
+# Compiled once at import; None when fastjsonschema is not installed
+_validate_command = fastjsonschema.compile(_COMMAND_SCHEMA) if fastjsonschema is not None else None
+
+# One AsyncOpenAI client per API key, shared by every controller so they reuse pooled connections
+_CLIENTS: Dict[str, "openai.AsyncOpenAI"] = {}
+
+def _get_client(api_key: str) -> "openai.AsyncOpenAI":
+    """Return the shared AsyncOpenAI client for api_key, creating it on first use"""
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        # The client's default pool (up to 1000 connections) already covers MAX_CONCURRENT_GOALS
+        # Retries are handled by LLMController._create_completion, so the client does not retry itself
+        client = _CLIENTS[api_key] = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+    return client
+
+async def aclose_clients():
+    """Close every shared AsyncOpenAI client and its pooled connections, once no controller needs them"""
+    clients = list(_CLIENTS.values())
+    _CLIENTS.clear()
+    for client in clients:
+        await client.close()
+
+def _settle_response(cache_key: Tuple[str, str], content: Optional[str], applied: bool):
+    """Cache a fresh response whose command applied, or evict a response whose command did not"""
+    if not applied:
+        _RESPONSE_CACHE.pop(cache_key, None)
+    elif content is not None:
+        _RESPONSE_CACHE[cache_key] = content
+        if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+
+def _normalize(text: str) -> Tuple[str, frozenset]:
+    """Lowercase text once and split it into its set of words, for the keyword helpers"""
+    norm = text.lower()
+    return norm, frozenset(_WORD_RE.findall(norm))
+
+if orjson is not None:
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj) -> str:
+        """Serialize obj as compact JSON"""
+        return orjson.dumps(obj).decode()
+    
+    def _json_pretty(obj) -> str:
+        """Serialize obj as indented JSON for logging"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+else:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj) -> str:
+        """Serialize obj as compact JSON"""
+        return json.dumps(obj, separators=(",", ":"))
+    
+    def _json_pretty(obj) -> str:
+        """Serialize obj as indented JSON for logging"""
+        return json.dumps(obj, indent=2)
+
 class LLMController:
     """Controller for integrating LLM with the simulation"""
-    def __init__(self, api_key: str = None, environment=None):
+    def __init__(self, api_key: str = None, environment=None, request_timeout: float = 10.0,
+                 cache_namespace: str = "default", model: str = OPENAI_MODEL,
+                 max_tokens: int = OPENAI_MAX_TOKENS):
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         self.environment = environment
+        self.model = model
+        self.max_tokens = max_tokens
+        self._rng = random.Random()  # Private generator, independent of the module-level random state
+        self.request_timeout = request_timeout  # Seconds before an OpenAI call is abandoned
+        # Controllers with the same namespace share cached responses; use distinct ones to keep sessions apart
+        self.cache_namespace = cache_namespace
+        # Serialized behavior commands keyed by (goal, grid size, drone roster), in LRU order; decoded on each
+        # hit so executing a command can never alter the cached copy
+        self._goal_cache: "OrderedDict[tuple, str]" = OrderedDict()
         
         # Initialize OpenAI client if API key is available
         if self.api_key:
-            openai.api_key = self.api_key
-            self.client = openai.Client(api_key=self.api_key)
+            self.client = _get_client(self.api_key)
+    
+    async def aclose(self):
+        """Drop this controller's reference to its OpenAI client
+        
+        The client is shared with every other controller using the same API key, so it is left open;
+        call aclose_clients() once at shutdown to close the shared clients.
+        """
+        self.client = None
+    
+    @staticmethod
+    def install_fast_loop() -> bool:
+        """Use uvloop's event loop for subsequent asyncio.run calls, if it is installed"""
+        if uvloop is None:
+            return False
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("Using uvloop event loop")
+        return True
     
     def _generate_random_position(self):
         """Generate a random position within the environment's bounds"""
         if not self.environment:
-            return {"x": random.randint(0, 10), "y": random.randint(0, 10)}
+            return {"x": self._rng.randrange(11), "y": self._rng.randrange(11)}
         
         return {
-            "x": random.randint(0, self.environment.width - 1),
-            "y": random.randint(0, self.environment.height - 1)
+            "x": self._rng.randrange(self.environment.width),
+            "y": self._rng.randrange(self.environment.height)
         }
     
     async def process_goal(self, goal_text: str, environment, drones: List, use_mock: bool = False) -> Dict:
         """Process a natural language goal and generate JSON commands for drones"""
         self.environment = environment
         
-        logger.info(f"Processing goal: {goal_text}")
-        
         if use_mock:
-            logger.info("Using mock LLM - would normally generate commands for the drones here")
-            
-            # Create an ExploreBehavior for all drones as a mock response
-            for drone in drones:
-                explore_behavior = ExploreBehavior(steps=-1)  # Explore indefinitely
-                drone.set_behavior(explore_behavior)
-                logger.info(f"Set drone {drone.drone_id} to explore behavior")
-            
-            return {"status": "success", "message": "Drones are now exploring the environment"}
+            return self._apply_mock_goal(goal_text, drones)
         
         # Real LLM implementation
         try:
-            # Generate the behavior command
-            behavior_command = await self._generate_behavior_command(goal_text, drones, environment)
-            
-            if behavior_command:
-                try:
-                    self.execute_behavior_command(behavior_command, environment, drones)
-                    logger.info(f"Successfully executed command: {json.dumps(behavior_command, indent=2)}")
-                    return {"status": "success", "message": "Command executed successfully"}
-                except Exception as e:
-                    logger.error(f"Error executing command: {e}")
-                    traceback.print_exc()
-                    return {"status": "error", "message": f"Error executing command: {str(e)}"}
-            else:
-                return {"status": "error", "message": "Could not parse command"}
-                
+            fetched = await self._fetch_goal_command(goal_text, environment, drones)
         except Exception as e:
-            logger.error(f"Error in LLM processing: {e}")
-            traceback.print_exc()
+            logger.exception("Error in LLM processing: %s", e)
             return {"status": "error", "message": f"Error processing command: {str(e)}"}
+        return self._apply_goal_command(fetched, environment, drones)
     
-    async def _generate_behavior_command(self, goal_text: str, drones: List, environment) -> Optional[Dict]:
-        """Use LLM to generate appropriate behavior commands based on goal"""
+    async def process_goals(self, goals: List[str], environment, drones: List, use_mock: bool = False,
+                            max_concurrency: int = MAX_CONCURRENT_GOALS) -> List:
+        """Process several goals, returning their result dicts in goal order
+        
+        Commands are fetched concurrently but applied in the order the goals were given, so the last goal
+        typed is the one that steers the drones however the replies arrive.
+        """
+        self.environment = environment
+        
+        if use_mock:
+            return [self._apply_mock_goal(goal_text, drones) for goal_text in goals]
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(goal_text: str):
+            async with semaphore:
+                return await self._fetch_goal_command(goal_text, environment, drones)
+        
+        fetched = await asyncio.gather(*(fetch(goal_text) for goal_text in goals), return_exceptions=True)
+        results = []
+        for item in fetched:
+            if isinstance(item, Exception):
+                logger.error("Error in LLM processing: %s", item, exc_info=item)
+                results.append({"status": "error", "message": f"Error processing command: {str(item)}"})
+            elif isinstance(item, BaseException):
+                raise item  # Cancellation and interpreter exits are not per-goal failures
+            else:
+                results.append(self._apply_goal_command(item, environment, drones))
+        return results
+    
+    def _apply_mock_goal(self, goal_text: str, drones: List) -> Dict:
+        """Stand in for the LLM by setting every drone to explore"""
+        logger.info("Processing goal: %s", goal_text)
+        logger.info("Using mock LLM - would normally generate commands for the drones here")
+        
+        # Create an ExploreBehavior for all drones as a mock response
+        for drone in drones:
+            explore_behavior = ExploreBehavior(steps=-1)  # Explore indefinitely
+            drone.set_behavior(explore_behavior)
+            logger.info("Set drone %s to explore behavior", drone.drone_id)
+        
+        return {"status": "success", "message": "Drones are now exploring the environment"}
+    
+    async def _fetch_goal_command(self, goal_text: str, environment, drones: List) -> Tuple:
+        """Get the behavior command for a goal without applying it
+        
+        Returns (goal key, command, cached, response entry), where the response entry is the
+        (cache key, content) pair settled in _RESPONSE_CACHE once the command has been applied, if any.
+        """
+        normalized = _normalize(goal_text)
+        logger.info("Processing goal: %s", goal_text)
+        
+        # A goal already seen with the same grid and fleet reuses its command without an API call
+        goal_key = (" ".join(normalized[0].split()), (environment.width, environment.height),
+                    tuple(sorted(drone.drone_id for drone in drones)))
+        content = self._goal_cache.get(goal_key)
+        if content is not None:
+            self._goal_cache.move_to_end(goal_key)
+            logger.info("Using cached command for goal")
+            return goal_key, _json_loads(content), True, None
+        
+        # Generate the behavior command
+        behavior_command, response_entry = await self._generate_behavior_command(
+            goal_text, drones, environment, normalized)
+        return goal_key, behavior_command, False, response_entry
+    
+    def _apply_goal_command(self, fetched: Tuple, environment, drones: List) -> Dict:
+        """Execute a command from _fetch_goal_command, caching it if it came from the LLM and applied cleanly"""
+        goal_key, behavior_command, cached, response_entry = fetched
+        if not behavior_command:
+            return {"status": "error", "message": "Could not parse command"}
+        
+        applied = False
+        try:
+            # Serialized before executing, so the cache keeps the command exactly as the LLM returned it
+            content = _json_dumps(behavior_command) if not cached and self.api_key else None
+            executed = self.execute_behavior_command(behavior_command, environment, drones)
+            if not executed:
+                return {"status": "error", "message": "Invalid behavior command"}
+            # Only commands that came from the LLM and applied cleanly are worth keeping
+            if content is not None:
+                self._goal_cache[goal_key] = content
+                if len(self._goal_cache) > GOAL_CACHE_SIZE:
+                    self._goal_cache.popitem(last=False)
+            applied = True
+            logger.info("Successfully executed command")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Executed command: %s", _json_pretty(behavior_command))
+            return {"status": "success", "message": "Command executed successfully"}
+        except Exception as e:
+            logger.exception("Error executing command: %s", e)
+            return {"status": "error", "message": f"Error executing command: {str(e)}"}
+        finally:
+            if response_entry is not None:
+                _settle_response(*response_entry, applied)
+    
+    async def _generate_behavior_command(self, goal_text: str, drones: List, environment,
+                                         normalized: Tuple[str, frozenset] = None) -> Tuple[Optional[Dict], Optional[tuple]]:
+        """Use LLM to generate appropriate behavior commands based on goal, with the response entry to cache"""
         # Create a prompt for the LLM
         system_prompt = self._generate_goal_system_prompt(drones, environment)
         user_prompt = goal_text
@@ -86,226 +366,179 @@ class LLMController:
         if not self.api_key:
             # Fallback to simple parsing for testing without API key
             logger.warning("No API key available - using simple fallback command generation")
-            return self._simple_goal_parser(goal_text, drones)
+            return self._simple_goal_parser(goal_text, drones, normalized), None
         
         try:
             # Make the API call to OpenAI
             logger.info("Calling OpenAI API")
-            response = await self._call_openai_api(system_prompt, user_prompt)
-            logger.info(f"Received LLM response: {json.dumps(response, indent=2)}")
-            return response
+            response, response_entry = await self._call_openai_api(system_prompt, user_prompt)
+            logger.info("Received LLM response")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("LLM response: %s", _json_pretty(response))
+            return response, response_entry
+        except asyncio.TimeoutError:
+            logger.warning("OpenAI API call timed out after %s seconds", self.request_timeout)
+            return None, None
         except Exception as e:
-            logger.error(f"Error calling OpenAI API: {e}")
-            traceback.print_exc()
-            return None
+            logger.exception("Error calling OpenAI API: %s", e)
+            return None, None
     
     def _generate_goal_system_prompt(self, drones: List, environment) -> str:
-        """Generate a system prompt for the LLM to plan behaviors based on goals"""
-        available_drones = ", ".join([f"drone{drone.drone_id}" for drone in drones])
-        env_width = environment.width
-        env_height = environment.height
+        """Generate the environment-specific system prompt that follows _STATIC_SYSTEM_PREFIX"""
+        # Sorted so the same fleet listed in a different order renders the same prompt
+        drone_ids = tuple(sorted(drone.drone_id for drone in drones))
+        system_prompt = self._dynamic_env_suffix(drone_ids, environment.width, environment.height)
+        logger.debug("Generated system prompt: %s", system_prompt)
+        return system_prompt
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _dynamic_env_suffix(drone_ids: tuple, width: int, height: int) -> str:
+        """Describe the grid and drone roster, reusing the same string when they repeat"""
+        available_drones = ", ".join([f"drone{drone_id}" for drone_id in drone_ids])
         
-        system_prompt = f"""You are a drone swarm controller that translates high-level goals into specific behaviors for drones.
-Your task is to analyze the user's goal and generate appropriate behavior commands for the drones.
-
-ENVIRONMENT INFORMATION:
-- Grid size: {env_width}x{env_height}
+        return f"""ENVIRONMENT INFORMATION:
+- Grid size: {width}x{height}
 - Available drones: {available_drones}
-
-AVAILABLE BEHAVIORS:
-1. "explore" - Random exploration of the environment
-   Parameters: steps (optional, -1 for indefinite)
-   
-2. "move_to" - Move to a specific position
-   Parameters: x (0-{env_width-1}), y (0-{env_height-1})
-   
-3. "patrol" - Patrol between multiple waypoints
-   Parameters: waypoints (list of positions), loops (optional, -1 for indefinite)
-   
-4. "search" - Systematic search with periodic scanning
-   Parameters: steps_between_scans, scan_range, max_steps (optional)
-
-You must respond with a valid JSON object that follows one of these structures:
-
-For explore behavior:
-```json
-{{
-    "behavior_type": "explore",
-    "targets": [
-        {{"drone_id": <drone_id_number>}},
-        ...
-        ],
-    "parameters": {{
-        
-    }}
-}}
-```
-
-For move_to behavior:
-```json
-{{
-    "behavior_type": "move_to",
-    "targets": [
-        {{"drone_id": <drone_id_number>}},
-        ...
-        ],
-    "parameters": {{
-        "x": <x_coordinate>,
-        "y": <y_coordinate>
-    }}
-}}
-```
-For patrol behavior:
-```json
-{{
-    "behavior_type": "patrol",
-    "targets": [
-        {{"drone_id": <drone_id_number>}},
-        ...
-        ],
-    "parameters": {{
-        "waypoints": [
-            {{"x": <x1>, "y": <y1>}},
-            {{"x": <x2>, "y": <y2>}},
-            ...
-        ],
-        "loops": <number_of_loops_or_-1>
-    }}
-}}
-```
-For search behavior:
-```json
-{{
-    "behavior_type": "search",
-    "targets": [
-        {{"drone_id": <drone_id_number>}},
-        ...
-    ],
-    "parameters": {{
-        "steps_between_scans": <steps>,
-        "scan_range": <range>,
-        "max_steps": <steps_or_-1>
-    }}
-}}
-```
-You can also specify different behaviors for different drones using multiple commands:
-```json
-[
-    {{behavior_command_1}},
-    {{behavior_command_2}},
-    ...
-]
-```
-
-RESPONSE FORMAT:
-Provide ONLY the JSON object with no additional text or explanation. Do not include the code block formatting in your response.
-If you cannot understand the goal, respond with: {{"error": "Could not parse goal"}}
 """
-        logger.debug(f"Generated system prompt: {system_prompt}")
-        return system_prompt
     
-    async def _call_openai_api(self, system_prompt: str, user_prompt: str) -> Dict:
-        """Make an API call to OpenAI using the official client"""
+    async def _call_openai_api(self, system_prompt: str, user_prompt: str) -> Tuple[Dict, Optional[tuple]]:
+        """Make an API call to OpenAI using the official client
+        
+        Returns the parsed reply and its (cache key, content) entry for the caller to pass to
+        _settle_response once the command has been applied; content is None for a cached reply.
+        """
         try:
+            # Identical requests reuse the earlier response instead of another round-trip
+            cache_key = (self.cache_namespace, hashlib.sha256(
+                f"{self.model}|{OPENAI_TEMPERATURE}|{self.max_tokens}|{system_prompt}|{user_prompt}".encode()
+            ).hexdigest())
+            content = _RESPONSE_CACHE.get(cache_key)
+            if content is not None:
+                _RESPONSE_CACHE.move_to_end(cache_key)
+                logger.info("Using cached OpenAI response")
+                return _json_loads(content), (cache_key, None)
+            
             # Call OpenAI API using async client
             logger.info("Sending prompt to OpenAI")
-            logger.debug(f"System prompt: {system_prompt}")
-            logger.debug(f"User prompt: {user_prompt}")
+            logger.debug("System prompt: %s", system_prompt)
+            logger.debug("User prompt: %s", user_prompt)
             
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model="gpt-3.5-turbo",  # or other appropriate model
-                response_format={"type": "json_object"},
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1  # Low temperature for more deterministic outputs
-            )
+            response = await self._create_completion([
+                {"role": "system", "content": _STATIC_SYSTEM_PREFIX},
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ])
             
             # Extract the JSON content from the response
             content = response.choices[0].message.content
-            logger.debug(f"Raw LLM response: {content}")
-            return json.loads(content)
+            logger.debug("Raw LLM response: %s", content)
+            # Not cached yet: error replies and commands that fail to apply must not be replayed
+            return _json_loads(content), (cache_key, content)
             
+        except asyncio.TimeoutError:
+            raise  # Reported by the caller without a traceback
         except Exception as e:
-            logger.error(f"Error in OpenAI API call: {e}")
-            traceback.print_exc()
+            logger.error("Error in OpenAI API call: %s", e)  # The caller logs the traceback
             raise
     
-    def _simple_goal_parser(self, text: str, drones: List) -> Dict:
+    async def _create_completion(self, messages: List[Dict]):
+        """Request a chat completion, retrying rate limits, connection errors and server errors"""
+        for attempt in range(OPENAI_MAX_ATTEMPTS):
+            try:
+                return await asyncio.wait_for(self.client.chat.completions.create(
+                    model=self.model,
+                    response_format={"type": "json_object"},
+                    messages=messages,
+                    temperature=OPENAI_TEMPERATURE,
+                    max_tokens=self.max_tokens
+                ), self.request_timeout)
+            except _RETRYABLE_ERRORS as e:
+                if attempt == OPENAI_MAX_ATTEMPTS - 1:
+                    raise
+                # Full jitter keeps concurrent goals from retrying in lockstep
+                delay = self._rng.uniform(0, min(OPENAI_MAX_BACKOFF, 2 ** attempt))
+                logger.warning("OpenAI request failed (%s), retrying in %.1f seconds", e, delay)
+                await asyncio.sleep(delay)
+    
+    def _simple_goal_parser(self, text: str, drones: List, normalized: Tuple[str, frozenset] = None) -> Dict:
         """A simple rule-based parser for goals when no API key is available"""
-        text = text.lower()
+        _, words = normalized or _normalize(text)
         
-        # Check for specific goal patterns
-        if any(word in text for word in ["search", "find", "look", "scan", "detect"]):
-            return {
-                "behavior_type": "search",
-                "targets": [{"drone_id": drone.drone_id} for drone in drones],
-                "parameters": {
-                    "steps_between_scans": 2,
-                    "scan_range": 2,
-                    "max_steps": -1
-                }
-            }
+        # Check for specific goal words, in priority order
+        behavior_type = "explore"  # Default to exploration
+        for candidate, keywords in _GOAL_KEYWORDS:
+            if not keywords.isdisjoint(words):
+                behavior_type = candidate
+                break
         
-        if any(word in text for word in ["explore", "roam", "wander"]):
+        return {
+            "behavior_type": behavior_type,
+            "targets": [{"drone_id": drone.drone_id} for drone in drones],
+            "parameters": self._default_goal_parameters(behavior_type)
+        }
+    
+    def _default_goal_parameters(self, behavior_type: str) -> Dict:
+        """Parameters used by the simple goal parser for each behavior type"""
+        if behavior_type == "search":
             return {
-                "behavior_type": "explore",
-                "targets": [{"drone_id": drone.drone_id} for drone in drones],
-                "parameters": {
-                    "steps": -1
-                }
+                "steps_between_scans": 2,
+                "scan_range": 2,
+                "max_steps": -1
             }
         
-        if any(word in text for word in ["patrol", "guard", "watch"]):
+        if behavior_type == "patrol":
             # Create a simple patrol around the center
             center_x = self.environment.width // 2
             center_y = self.environment.height // 2
             radius = min(3, min(center_x, center_y))
             
             return {
-                "behavior_type": "patrol",
-                "targets": [{"drone_id": drone.drone_id} for drone in drones],
-                "parameters": {
-                    "waypoints": [
-                        {"x": center_x - radius, "y": center_y - radius},
-                        {"x": center_x + radius, "y": center_y - radius},
-                        {"x": center_x + radius, "y": center_y + radius},
-                        {"x": center_x - radius, "y": center_y + radius}
-                    ],
-                    "loops": -1
-                }
+                "waypoints": [
+                    {"x": center_x - radius, "y": center_y - radius},
+                    {"x": center_x + radius, "y": center_y - radius},
+                    {"x": center_x + radius, "y": center_y + radius},
+                    {"x": center_x - radius, "y": center_y + radius}
+                ],
+                "loops": -1
             }
         
-        # Default to exploration
         return {
-            "behavior_type": "explore",
-            "targets": [{"drone_id": drone.drone_id} for drone in drones],
-            "parameters": {
-                "steps": -1
-            }
+            "steps": -1
         }
     
     def execute_behavior_command(self, command_json: Dict, environment, drones: List) -> bool:
         """Execute a behavior command"""
+        if _validate_command is not None:
+            try:
+                _validate_command(command_json)
+            except fastjsonschema.JsonSchemaException as e:
+                logger.error("Invalid behavior command: %s", e.message)
+                return False
+        
         try:
+            # Index the drones once for every command in the batch
+            id_map = self._index_drones(drones)
+            
             # Check if we have multiple commands
             if isinstance(command_json, list):
                 for cmd in command_json:
-                    self._execute_single_behavior_command(cmd, environment, drones)
+                    self._execute_single_behavior_command(cmd, environment, drones, id_map)
                 return True
             else:
-                return self._execute_single_behavior_command(command_json, environment, drones)
+                return self._execute_single_behavior_command(command_json, environment, drones, id_map)
                 
         except Exception as e:
-            logger.error(f"Error executing behavior command: {e}")
-            traceback.print_exc()
+            logger.exception("Error executing behavior command: %s", e)
             return False
     
-    def _execute_single_behavior_command(self, command_json: Dict, environment, drones: List) -> bool:
+    def _execute_single_behavior_command(self, command_json: Dict, environment, drones: List,
+                                         id_map: Dict[int, Any] = None) -> bool:
         """Execute a single behavior command"""
         try:
+            if id_map is None:
+                id_map = self._index_drones(drones)
+            
             # Get behavior type and parameters
             behavior_type = command_json.get("behavior_type")
             targets = command_json.get("targets", [])
@@ -319,20 +552,14 @@ If you cannot understand the goal, respond with: {{"error": "Could not parse goa
             target_drones = []
             for target in targets:
                 drone_id = target.get("drone_id")
-                if not drone_id:
+                if drone_id is None:
                     continue
-                    
-                # Find the drone object
-                drone = None
-                for d in drones:
-                    if d.drone_id == drone_id:
-                        drone = d
-                        break
                 
-                if drone:
+                drone = id_map.get(drone_id)
+                if drone is not None:
                     target_drones.append(drone)
                 else:
-                    logger.warning(f"Drone with ID {drone_id} not found")
+                    logger.warning("Drone with ID %s not found", drone_id)
             
             if not target_drones:
                 logger.error("No valid target drones found")
@@ -348,30 +575,54 @@ If you cannot understand the goal, respond with: {{"error": "Could not parse goa
                     
                     # Set new behavior
                     drone.set_behavior(behavior)
-                    logger.info(f"Set drone {drone.drone_id} to {behavior_type} behavior")
+                    logger.info("Set drone %s to %s behavior", drone.drone_id, behavior_type)
                 else:
-                    logger.error(f"Failed to create behavior of type {behavior_type}")
+                    logger.error("Failed to create behavior of type %s", behavior_type)
                     return False
             
             return True
             
         except Exception as e:
-            logger.error(f"Error executing behavior command: {e}")
-            traceback.print_exc()
+            logger.exception("Error executing behavior command: %s", e)
             return False
             
     # Keep existing methods for backward compatibility
-    def _is_likely_movement_command(self, text: str) -> bool:
+    def _is_likely_movement_command(self, text: str, normalized: Tuple[str, frozenset] = None) -> bool:
         """Determine if text is likely a movement command"""
-        movement_keywords = ["move", "go", "take", "send", "navigate", "direct", "guide", "fly", "left", 
-                            "right", "up", "down", "north", "south", "east", "west"]
-        drone_keywords = ["drone", "uav", "quadcopter", "copter"]
-        
-        text_lower = text.lower()
-        has_movement = any(keyword in text_lower for keyword in movement_keywords)
-        has_drone = any(keyword in text_lower for keyword in drone_keywords)
+        _, words = normalized or _normalize(text)
+        return not _MOVEMENT_KEYWORDS.isdisjoint(words) and not _DRONE_KEYWORDS.isdisjoint(words)
+    
+    @staticmethod
+    def _validate_movements(movements) -> List[Tuple[str, int]]:
+        """Return the (direction, steps) runs of a move command, skipping malformed entries"""
+        if not isinstance(movements, list):
+            logger.warning("Invalid movements: %s", movements)
+            return []
         
-        return has_movement and has_drone
+        valid = []
+        for movement in movements:
+            if not isinstance(movement, dict):
+                logger.warning("Invalid movement: %s", movement)
+                continue
+            direction = movement.get("direction")
+            steps = movement.get("steps", 1)
+            if direction not in _VALID_DIRECTIONS:
+                logger.warning("Invalid direction: %s", direction)
+                continue
+            if type(steps) is not int or steps < 1:
+                logger.warning("Invalid step count: %r", steps)
+                continue
+            if valid and valid[-1][0] == direction:
+                # Consecutive moves in one direction become a single longer move
+                valid[-1] = (direction, valid[-1][1] + steps)
+            else:
+                valid.append((direction, steps))
+        return valid
+    
+    @staticmethod
+    def _index_drones(drones: List) -> Dict[int, Any]:
+        """Map drone IDs to drone objects, without assuming IDs are 1..N"""
+        return {drone.drone_id: drone for drone in drones}
     
     def execute_json_command(self, command_json: Dict, environment, drones: List) -> bool:
         """Execute a JSON command (maintained for backward compatibility)"""
@@ -381,12 +632,11 @@ If you cannot understand the goal, respond with: {{"error": "Could not parse goa
             if command_type == "move":
                 return self._execute_move_command(command_json, environment, drones)
             else:
-                logger.warning(f"Unknown command type: {command_type}")
+                logger.warning("Unknown command type: %s", command_type)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error executing JSON command: {e}")
-            traceback.print_exc()
+            logger.exception("Error executing JSON command: %s", e)
             return False
     
     def _execute_move_command(self, command_json: Dict, environment, drones: List) -> bool:
@@ -395,41 +645,29 @@ If you cannot understand the goal, respond with: {{"error": "Could not parse goa
             # Get target drone
             target = command_json.get("target", {})
             drone_id = target.get("drone_id")
-            
-            # Find the drone object
-            drone = None
-            for d in drones:
-                if d.drone_id == drone_id:
-                    drone = d
-                    break
+            drone = self._index_drones(drones).get(drone_id)
             
             if not drone:
-                logger.warning(f"Drone with ID {drone_id} not found")
+                logger.warning("Drone with ID %s not found", drone_id)
+                return False
+            
+            # Validate everything before touching the drone's current orders
+            movements = self._validate_movements(command_json.get("parameters", {}).get("movements", []))
+            if not movements:
+                logger.error("Invalid command: no valid movements")
                 return False
             
             # Clear existing actions and behaviors
             drone.clear_behavior()
             drone.clear_actions()
             
-            # Process movements
-            movements = command_json.get("parameters", {}).get("movements", [])
-            for movement in movements:
-                direction = movement.get("direction")
-                steps = movement.get("steps")
-                
-                if direction not in ["up", "down", "left", "right"]:
-                    logger.warning(f"Invalid direction: {direction}")
-                    continue
-                
-                # Add movement actions to the drone
-                for _ in range(steps):
-                    drone.add_action(MoveAction(direction))
+            # One multi-step action per movement, queued in one call
+            drone.extend_actions(MoveAction(direction, steps) for direction, steps in movements)
             
-            logger.info(f"Command executed: Drone {drone_id} will perform {len(movements)} movement(s)")
+            logger.info("Command executed: Drone %s will perform %s movement(s)", drone_id, len(movements))
             return True
             
         except Exception as e:
-            logger.error(f"Error executing move command: {e}")
-            traceback.print_exc()
+            logger.exception("Error executing move command: %s", e)
             return False
             
\ No newline at end of file
@@ -1,19 +1,24 @@
 import asyncio
 import argparse
-import random
 from environment import GridEnvironment, Position, Entity
 from drone import Detector, Drone, MoveAction, WaitAction, ScanAction
 from behavior import MoveToBehavior, ExploreBehavior, PatrolBehavior
-from llm_controller import LLMController
+from llm_controller import LLMController, aclose_clients
 from event_system import EventManager, EventCallback
 from command_processor import CommandProcessor
+from planner import warm_up as warm_up_planner
 from typing import List, Dict
 import re
+import time
+import numpy as np
 import pygame
-import traceback
+
+FRAME_RATE = 10  # Simulation ticks per second
 
 class Target(Entity):
     """A simple target entity for drones to find"""
+    __slots__ = ()
+    
     def __init__(self, position: Position):
         super().__init__(position, "target")
     
@@ -22,6 +27,77 @@ class Target(Entity):
         y = self.position.y * cell_size
         pygame.draw.rect(surface, (255, 0, 0), (x + 4, y + 4, cell_size - 8, cell_size - 8))
 
+def build_background(environment: GridEnvironment) -> pygame.Surface:
+    """Draw the black background, grid lines and input area fill onto a reusable surface"""
+    background = pygame.Surface((environment.screen_width, environment.screen_height))
+    background.fill((0, 0, 0))  # Black background
+    
+    # Draw grid lines
+    for x in range(0, environment.width * environment.cell_size, environment.cell_size):
+        pygame.draw.line(background, (50, 50, 50), (x, 0), 
+                         (x, environment.height * environment.cell_size))
+    for y in range(0, environment.height * environment.cell_size, environment.cell_size):
+        pygame.draw.line(background, (50, 50, 50), (0, y), 
+                         (environment.width * environment.cell_size, y))
+    
+    # Draw text input area
+    input_area = pygame.Rect(0, environment.height * environment.cell_size, 
+                             environment.screen_width, environment.text_input_height)
+    pygame.draw.rect(background, (50, 50, 70), input_area)
+    return background
+
+def draw_input_area(environment: GridEnvironment, background: pygame.Surface,
+                    prompt_surface: pygame.Surface, input_surface: pygame.Surface) -> pygame.Rect:
+    """Redraw the text input area over its background, returning its rectangle"""
+    input_area = pygame.Rect(0, environment.height * environment.cell_size, 
+                             environment.screen_width, environment.text_input_height)
+    environment.screen.blit(background, input_area, input_area)
+    
+    # Add some visual feedback on active input box
+    if environment.input_active:
+        pygame.draw.rect(environment.screen, (100, 100, 200), input_area, 2)
+    else:
+        pygame.draw.rect(environment.screen, (70, 70, 100), input_area, 2)
+    
+    # Render the input text
+    environment.screen.blit(prompt_surface, (10, environment.height * environment.cell_size + 10))
+    environment.screen.blit(input_surface, (100, environment.height * environment.cell_size + 10))
+    return input_area
+
+def redraw_cells(environment: GridEnvironment, background: pygame.Surface, cells) -> List[pygame.Rect]:
+    """Recomposite the cells around the given ones from the background and entities, returning the changed areas"""
+    cell_size = environment.cell_size
+    # Drawings (ID labels in particular) can spill into adjacent cells, so the whole neighbourhood is repainted
+    region = {(x + dx, y + dy) for x, y in cells for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+              if 0 <= x + dx < environment.width and 0 <= y + dy < environment.height}
+    
+    # Entities that can reach into each repainted cell, in the usual drawing order
+    reaching = {}
+    for entity in environment.entities:
+        ex, ey = entity.position.x, entity.position.y
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if (ex + dx, ey + dy) in region:
+                    reaching.setdefault((ex + dx, ey + dy), []).append(entity)
+    
+    # Each cell is cleared to the background before anything is drawn into it, and drawing is clipped
+    # to the cell, so no pixel is ever blended over its previous frame
+    screen = environment.screen
+    rects = []
+    for x, y in region:
+        rect = pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size)
+        screen.set_clip(rect)
+        screen.blit(background, rect, rect)
+        entities = reaching.get((x, y))
+        if entities:
+            blits = []
+            for entity in entities:
+                entity.render_batched(screen, cell_size, blits)
+            screen.blits(blits, doreturn=False)
+        rects.append(rect)
+    screen.set_clip(None)
+    return rects
+
 async def run_simulation():
     # Parse arguments
     parser = argparse.ArgumentParser(description='Run drone swarm simulation')
@@ -42,14 +118,15 @@ async def run_simulation():
     command_processor = CommandProcessor()
     environment.command_processor = command_processor
     
+    # Random positions for all drones and targets, drawn in one call per axis
+    num_entities = args.num_drones + args.num_targets
+    xs = np.random.randint(0, args.width, num_entities).tolist()
+    ys = np.random.randint(0, args.height, num_entities).tolist()
+    
     # Create drones and equip them with detectors
     drones = []
     for i in range(args.num_drones):
-        # Random position for the drone
-        position = Position(
-            random.randint(0, args.width - 1),
-            random.randint(0, args.height - 1)
-        )
+        position = Position(xs[i], ys[i])
         drone = Drone(position, i + 1)
         
         # Create and attach a detector
@@ -63,12 +140,8 @@ async def run_simulation():
     command_processor.set_drones(drones)
     
     # Create targets
-    for i in range(args.num_targets):
-        # Random position for the target
-        position = Position(
-            random.randint(0, args.width - 1),
-            random.randint(0, args.height - 1)
-        )
+    for i in range(args.num_drones, num_entities):
+        position = Position(xs[i], ys[i])
         target = Target(position)
         environment.add_entity(target)
     
@@ -97,8 +170,22 @@ async def run_simulation():
     # Initialize LLM controller
     llm_controller = LLMController()
     
+    async def dispatch_goals(goals: List[str]):
+        """Send a batch of goals to the LLM controller concurrently and report failures"""
+        print(f"Dispatching {len(goals)} goal(s)")
+        responses = await llm_controller.process_goals(goals, environment, drones, use_mock=args.mock)
+        for response in responses:
+            if response.get("status") == "error":
+                print(f"Error from LLM controller: {response.get('message')}")
+    
+    # Goals entered while a batch is in flight wait here for the next batch
+    pending_goals: List[str] = []
+    goal_task = None
+    
     # Initialize the environment
     environment.initialize()
+    # Compile the path planner now rather than stalling the first frame that plans a path
+    warm_up_planner()
     
     # Set initial input text to default goal
     environment.input_text = "Search for and find all targets in the environment"
@@ -109,14 +196,29 @@ async def run_simulation():
     
     # MAIN SIMULATION LOOP
     font = pygame.font.SysFont(None, 24)
-    clock = pygame.time.Clock()
+    # The label never changes and the input text only changes on key presses, so render them on demand
+    prompt_surface = font.render("Command: ", True, (200, 200, 200))
+    last_input_text = None
+    input_surface = None
+    # Static parts of the frame, rebuilt only if the grid dimensions change
+    background = build_background(environment)
+    background_key = (environment.width, environment.height, environment.cell_size)
+    # Only areas that changed since the last frame are redrawn and pushed to the display
+    drawn_cells = {}  # Cell each entity occupied when it was last drawn
+    last_input_state = None
+    full_redraw = True
     
     while environment.running:
+        frame_start = time.perf_counter()
+        
         # Process Pygame events
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 environment.running = False
             
+            elif event.type == pygame.VIDEOEXPOSE:
+                full_redraw = True  # The window contents were lost, e.g. after being uncovered
+            
             # Handle text input events
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 # Check if click was in the text input area
@@ -130,67 +232,65 @@ async def run_simulation():
             elif event.type == pygame.KEYDOWN:
                 if environment.input_active:
                     if event.key == pygame.K_RETURN:
-                        # Process the goal when Enter is pressed
+                        # Queue the goal when Enter is pressed; the simulation keeps running while it is processed
                         goal = environment.input_text
                         print(f"New goal received: {goal}")
-                        try:
-                            # Process the new goal asynchronously
-                            response = await llm_controller.process_goal(goal, environment, drones, use_mock=args.mock)
-                            if response.get("status") == "error":
-                                print(f"Error from LLM controller: {response.get('message')}")
-                        except Exception as e:
-                            print(f"Error processing goal: {e}")
-                            traceback.print_exc()
+                        pending_goals.append(goal)
                         environment.input_text = ""  # Clear the input
                     elif event.key == pygame.K_BACKSPACE:
                         environment.input_text = environment.input_text[:-1]
                     else:
                         environment.input_text += event.unicode
         
+        # Hand queued goals to the LLM controller once the previous batch has finished
+        if pending_goals and (goal_task is None or goal_task.done()):
+            goal_task = asyncio.create_task(dispatch_goals(pending_goals))
+            pending_goals = []
+        
         # Update all entities
         environment.update()
         
-        # Render everything
-        environment.screen.fill((0, 0, 0))  # Black background
+        # Render only what changed, starting from the pre-drawn grid and input area
+        if background_key != (environment.width, environment.height, environment.cell_size):
+            background = build_background(environment)
+            background_key = (environment.width, environment.height, environment.cell_size)
+            full_redraw = True
         
-        # Draw grid lines
-        for x in range(0, environment.width * environment.cell_size, environment.cell_size):
-            pygame.draw.line(environment.screen, (50, 50, 50), (x, 0), 
-                             (x, environment.height * environment.cell_size))
-        for y in range(0, environment.height * environment.cell_size, environment.cell_size):
-            pygame.draw.line(environment.screen, (50, 50, 50), (0, y), 
-                             (environment.width * environment.cell_size, y))
+        if environment.input_text != last_input_text:
+            input_surface = font.render(environment.input_text, True, (255, 255, 255))
+            last_input_text = environment.input_text
+        input_state = (environment.input_text, environment.input_active)
+        cells = {entity: (entity.position.x, entity.position.y) for entity in environment.entities}
         
-        # Draw all entities
-        for entity in environment.entities:
-            entity.render(environment.screen, environment.cell_size)
-        
-        # Draw text input area
-        input_area = pygame.Rect(0, environment.height * environment.cell_size, 
-                                 environment.screen_width, environment.text_input_height)
-        pygame.draw.rect(environment.screen, (50, 50, 70), input_area)
-        
-        # Add some visual feedback on active input box
-        if environment.input_active:
-            pygame.draw.rect(environment.screen, (100, 100, 200), input_area, 2)
+        if full_redraw:
+            environment.screen.blit(background, (0, 0))
+            environment.render_entities(environment.screen)
+            draw_input_area(environment, background, prompt_surface, input_surface)
+            pygame.display.flip()
+            full_redraw = False
         else:
-            pygame.draw.rect(environment.screen, (70, 70, 100), input_area, 2)
-            
-        # Render the input text
-        prompt_text = font.render("Command: ", True, (200, 200, 200))
-        environment.screen.blit(prompt_text, (10, environment.height * environment.cell_size + 10))
-        
-        input_text = font.render(environment.input_text, True, (255, 255, 255))
-        environment.screen.blit(input_text, (100, environment.height * environment.cell_size + 10))
-        
-        # Update the display
-        pygame.display.flip()
+            # Cells an entity left, entered, appeared in or vanished from since the last frame
+            dirty_cells = {cell for entity, cell in drawn_cells.items() if cells.get(entity) != cell}
+            dirty_cells.update(cell for entity, cell in cells.items() if drawn_cells.get(entity) != cell)
+            dirty_rects = redraw_cells(environment, background, dirty_cells) if dirty_cells else []
+            if input_state != last_input_state:
+                dirty_rects.append(draw_input_area(environment, background, prompt_surface, input_surface))
+            if dirty_rects:
+                pygame.display.update(dirty_rects)
+        drawn_cells = cells
+        last_input_state = input_state
         
-        # Cap the frame rate
-        clock.tick(10)  # 10 FPS
+        # Cap the frame rate, letting in-flight LLM requests progress while waiting for the next frame
+        await asyncio.sleep(max(0.0, 1.0 / FRAME_RATE - (time.perf_counter() - frame_start)))
     
     # Clean up
+    if goal_task is not None and not goal_task.done():
+        goal_task.cancel()
+        await asyncio.gather(goal_task, return_exceptions=True)  # Let the cancellation finish before closing
+    await llm_controller.aclose()
+    await aclose_clients()
     pygame.quit()
 
 if __name__ == "__main__":
+    LLMController.install_fast_loop()
     asyncio.run(run_simulation()) 
\ No newline at end of file
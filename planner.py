@@ -0,0 +1,189 @@
+import heapq
+import numpy as np
+from typing import Sequence
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; fall back to the pure-Python planner
+    njit = None
+
+# Direction codes produced by the planner index into these tables; the first four are orthogonal
+MOVE_NAMES = ("up", "down", "left", "right", "up_left", "up_right", "down_left", "down_right")
+_DX = np.array([0, 0, -1, 1, -1, 1, -1, 1], dtype=np.int32)
+_DY = np.array([-1, 1, 0, 0, -1, -1, 1, 1], dtype=np.int32)
+# Integer move costs: 7/5 approximates sqrt(2) for diagonal steps
+_ORTHOGONAL_COST = 5
+_DIAGONAL_COST = 7
+_INF = np.int32(2 ** 30)
+
+def _heuristic_py(dx: int, dy: int, diagonal: bool) -> int:
+    """Chebyshev distance scaled by the move costs (octile distance when diagonals are allowed)"""
+    dx, dy = abs(dx), abs(dy)
+    if diagonal:
+        return _ORTHOGONAL_COST * max(dx, dy) + (_DIAGONAL_COST - _ORTHOGONAL_COST) * min(dx, dy)
+    return _ORTHOGONAL_COST * max(dx, dy)
+
+def _astar_py(grid: np.ndarray, sx: int, sy: int, gx: int, gy: int, diagonal: bool = False) -> Sequence[int]:
+    """A* over an obstacle grid using heapq, returns direction codes"""
+    height, width = grid.shape
+    if not (0 <= gx < width and 0 <= gy < height) or grid[gy, gx] != 0:
+        return ()
+
+    start = (sx, sy)
+    goal = (gx, gy)
+    g_score = {start: 0}
+    came_from = {}
+    # Heap entries are (f, g, tie-breaker, node)
+    counter = 0
+    open_heap = [(_heuristic_py(gx - sx, gy - sy, diagonal), 0, counter, start)]
+    num_moves = len(MOVE_NAMES) if diagonal else 4
+
+    while open_heap:
+        _, g, _, node = heapq.heappop(open_heap)
+        if node == goal:
+            codes = []
+            while node in came_from:
+                node, code = came_from[node]
+                codes.append(code)
+            codes.reverse()
+            return tuple(codes)
+        if g > g_score[node]:
+            continue  # Stale heap entry
+
+        x, y = node
+        for code in range(num_moves):
+            dx, dy = int(_DX[code]), int(_DY[code])
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height) or grid[ny, nx] != 0:
+                continue
+            if code >= 4:
+                # Don't cut corners past blocked cells
+                if grid[y, nx] != 0 or grid[ny, x] != 0:
+                    continue
+                new_g = g + _DIAGONAL_COST
+            else:
+                new_g = g + _ORTHOGONAL_COST
+            neighbor = (nx, ny)
+            if new_g >= g_score.get(neighbor, new_g + 1):
+                continue
+            g_score[neighbor] = new_g
+            came_from[neighbor] = (node, code)
+            counter += 1
+            h = _heuristic_py(gx - nx, gy - ny, diagonal)
+            heapq.heappush(open_heap, (new_g + h, new_g, counter, neighbor))
+
+    return ()
+
+if njit is not None:
+    _heuristic_nb = njit(cache=True)(_heuristic_py)
+
+    @njit(cache=True)
+    def _heap_push(heap_f, heap_n, size, f, node):
+        """Push (f, node) onto the binary min-heap stored in heap_f/heap_n, returns the new size"""
+        i = size
+        heap_f[i] = f
+        heap_n[i] = node
+        while i > 0:
+            parent = (i - 1) >> 1
+            if heap_f[parent] <= heap_f[i]:
+                break
+            heap_f[parent], heap_f[i] = heap_f[i], heap_f[parent]
+            heap_n[parent], heap_n[i] = heap_n[i], heap_n[parent]
+            i = parent
+        return size + 1
+
+    @njit(cache=True)
+    def _heap_pop(heap_f, heap_n, size):
+        """Pop the smallest entry, returns (f, node, new_size)"""
+        f = heap_f[0]
+        node = heap_n[0]
+        size -= 1
+        heap_f[0] = heap_f[size]
+        heap_n[0] = heap_n[size]
+        i = 0
+        while True:
+            left = 2 * i + 1
+            if left >= size:
+                break
+            child = left
+            if left + 1 < size and heap_f[left + 1] < heap_f[left]:
+                child = left + 1
+            if heap_f[i] <= heap_f[child]:
+                break
+            heap_f[child], heap_f[i] = heap_f[i], heap_f[child]
+            heap_n[child], heap_n[i] = heap_n[i], heap_n[child]
+            i = child
+        return f, node, size
+
+    @njit(cache=True)
+    def astar_nb(grid, sx, sy, gx, gy, diagonal=False):
+        """A* over an int8 obstacle grid in native code, returns an int32 array of direction codes"""
+        height, width = grid.shape
+        if gx < 0 or gx >= width or gy < 0 or gy >= height or grid[gy, gx] != 0:
+            return np.empty(0, dtype=np.int32)
+
+        n = height * width
+        g_score = np.full(n, _INF, dtype=np.int32)
+        came_from = np.full(n, -1, dtype=np.int8)
+        # Every relaxation may push a node, so one entry per move per cell bounds the heap
+        num_moves = 8 if diagonal else 4
+        heap_f = np.empty(num_moves * n + 1, dtype=np.int32)
+        heap_n = np.empty(num_moves * n + 1, dtype=np.int32)
+
+        start = sy * width + sx
+        goal = gy * width + gx
+        g_score[start] = 0
+        size = _heap_push(heap_f, heap_n, 0, _heuristic_nb(gx - sx, gy - sy, diagonal), start)
+
+        while size > 0:
+            f, node, size = _heap_pop(heap_f, heap_n, size)
+            x = node % width
+            y = node // width
+            g = g_score[node]
+            if f - _heuristic_nb(gx - x, gy - y, diagonal) > g:
+                continue  # Stale heap entry
+
+            if node == goal:
+                length = 0
+                cur = goal
+                while cur != start:
+                    code = came_from[cur]
+                    cur -= _DY[code] * width + _DX[code]
+                    length += 1
+                codes = np.empty(length, dtype=np.int32)
+                cur = goal
+                for k in range(length - 1, -1, -1):
+                    code = came_from[cur]
+                    codes[k] = code
+                    cur -= _DY[code] * width + _DX[code]
+                return codes
+
+            for code in range(num_moves):
+                nx = x + _DX[code]
+                ny = y + _DY[code]
+                if nx < 0 or nx >= width or ny < 0 or ny >= height or grid[ny, nx] != 0:
+                    continue
+                if code >= 4:
+                    # Don't cut corners past blocked cells
+                    if grid[y, nx] != 0 or grid[ny, x] != 0:
+                        continue
+                    new_g = g + _DIAGONAL_COST
+                else:
+                    new_g = g + _ORTHOGONAL_COST
+                neighbor = ny * width + nx
+                if new_g < g_score[neighbor]:
+                    g_score[neighbor] = new_g
+                    came_from[neighbor] = code
+                    size = _heap_push(heap_f, heap_n, size,
+                                      new_g + _heuristic_nb(gx - nx, gy - ny, diagonal), neighbor)
+
+        return np.empty(0, dtype=np.int32)
+
+    astar = astar_nb
+else:
+    astar = _astar_py
+
+def warm_up():
+    """Plan one trivial path so the native planner is compiled (or loaded from cache) before it is needed"""
+    # obstacle_grid is int8 and plan_path passes ints and a bool, so this matches the signature used later
+    astar(np.zeros((1, 2), dtype=np.int8), 0, 0, 1, 0, False)